@@ -1,23 +1,39 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Form, Response, Body
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from PIL import Image
 from surya.recognition import RecognitionPredictor
 from surya.detection import DetectionPredictor
 from PyPDF2 import PdfReader
 from pdf2image import convert_from_bytes
+import hashlib
 import io
+import logging
 import re
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Hashable, Sequence
 from pydantic import BaseModel
-import base64
+import pybase64
+
+# uvicorn only configures its own loggers, so give this module a handler of
+# its own (in uvicorn's format) for notices to reach the console
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _log_handler = logging.StreamHandler()
+    _log_handler.setFormatter(logging.Formatter("%(levelname)s:     %(message)s"))
+    logger.addHandler(_log_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
 
 class TextEdit(BaseModel):
     page: int
     text_lines: List[Dict[str, Any]]
 
-app = FastAPI()
+# orjson serializes the large polygon/bbox payloads much faster than stdlib json
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # Configure CORS
 app.add_middleware(
@@ -36,10 +52,60 @@ async def add_allow_iframe(request, call_next):
     response.headers["X-Frame-Options"] = "ALLOWALL"
     return response
 
+# Uploaded images larger than this are rejected before PIL touches them
+MAX_IMAGE_BYTES = 32 * 1024 * 1024
+
 # Initialize predictors once
 recognition_predictor = RecognitionPredictor()
 detection_predictor = DetectionPredictor()
 
+# The predictors share model state, so only one OCR call runs at a time
+ocr_lock = threading.Lock()
+
+# OCR results keyed by upload content hash (plus page and DPI for PDFs), so
+# re-processing the same page or image (e.g. after a frontend reload) skips
+# rendering and the models entirely. Guarded by its own short lock so cache
+# hits never wait behind a running OCR pass.
+OCR_CACHE_SIZE = 64
+ocr_cache: "OrderedDict[Hashable, Any]" = OrderedDict()
+ocr_cache_lock = threading.Lock()
+
+# Resolution PDF pages are rendered at for OCR
+PROCESS_PDF_DPI = 225
+
+def content_hash(contents: bytes) -> bytes:
+    """Return a short hash identifying uploaded file contents."""
+    return hashlib.blake2b(contents, digest_size=16).digest()
+
+def ocr_cache_get(keys: Sequence[Hashable]) -> list:
+    """Return cached OCR results for keys, with None for misses."""
+    with ocr_cache_lock:
+        predictions = [ocr_cache.get(key) for key in keys]
+        for key, pred in zip(keys, predictions):
+            if pred is not None:
+                ocr_cache.move_to_end(key)
+    return predictions
+
+def ocr_cache_put(items: Dict[Hashable, Any]) -> None:
+    """Store OCR results, evicting the least recently used entries."""
+    with ocr_cache_lock:
+        ocr_cache.update(items)
+        for key in items:
+            ocr_cache.move_to_end(key)
+        while len(ocr_cache) > OCR_CACHE_SIZE:
+            ocr_cache.popitem(last=False)
+
+def run_ocr(images: List[Image.Image]) -> list:
+    """Run OCR on a list of images (blocking; call via run_in_threadpool)."""
+    with ocr_lock:
+        return recognition_predictor(
+            images,
+            [["en"]] * len(images),
+            detection_predictor,
+            recognition_batch_size=16,
+            detection_batch_size=16
+        )
+
 def parse_page_selection(page_selection: str, total_pages: int) -> List[int]:
     """Parse page selection string and return list of page numbers."""
     if not page_selection or page_selection.isspace():
@@ -89,6 +155,49 @@ def serialize_ocr_result(result):
         "image_bbox": result.image_bbox
     }
 
+# Largest number of unselected pages rendered to avoid another poppler call
+MAX_RENDER_GAP = 2
+
+def render_pdf_pages(contents: bytes, pages: Sequence[int], dpi: int = 200) -> Dict[int, Image.Image]:
+    """Render the given 1-based PDF pages and return the images keyed by page number.
+
+    Each convert_from_bytes call writes the PDF to a temp file and spawns
+    pdfinfo and pdftoppm, so selected pages separated by at most
+    MAX_RENDER_GAP pages share one call (rendering the pages in between and
+    discarding them); larger gaps are cheaper as separate calls.
+    """
+    selected = sorted(set(pages))
+    runs = []
+    for page in selected:
+        if runs and page - runs[-1][1] <= MAX_RENDER_GAP + 1:
+            runs[-1][1] = page
+        else:
+            runs.append([page, page])
+
+    page_images = {}
+    for first, last in runs:
+        images = convert_from_bytes(
+            contents,
+            first_page=first,
+            last_page=last,
+            dpi=dpi,
+            fmt='png',  # Use PNG format for better quality
+            thread_count=2,  # Use multiple threads for faster processing
+            use_cropbox=True,  # Use cropbox instead of mediabox
+            strict=False  # Less strict parsing for better compatibility
+        )
+        page_images.update(zip(range(first, last + 1), images))
+    return {page: page_images[page] for page in selected if page in page_images}
+
+def encode_png_data_url(image: Image.Image) -> str:
+    """Encode a PIL image as a base64 PNG data URL."""
+    img_byte_arr = io.BytesIO()
+    # Fastest zlib level: several times quicker to encode than the
+    # default for only slightly larger output
+    image.save(img_byte_arr, format='PNG', compress_level=1)
+    base64_encoded = pybase64.b64encode(img_byte_arr.getbuffer()).decode('ascii')
+    return f"data:image/png;base64,{base64_encoded}"
+
 @app.post("/pdf-info")
 async def get_pdf_info(file: UploadFile = File(...)):
     """Get basic information about the PDF file."""
@@ -116,9 +225,8 @@ async def process_pdf(
         # Read PDF file
         contents = await file.read()
         
-        # Debug: Print file size and first few bytes
-        print(f"Received file size: {len(contents)} bytes")
-        print(f"First 20 bytes: {contents[:20]}")
+        logger.debug("Received file size: %d bytes", len(contents))
+        logger.debug("First 20 bytes: %r", contents[:20])
         
         # Create a new BytesIO object and write the contents
         pdf_stream = io.BytesIO(contents)
@@ -128,7 +236,7 @@ async def process_pdf(
             pdf = PdfReader(pdf_stream)
             total_pages = len(pdf.pages)
         except Exception as pdf_error:
-            print(f"PDF Error details: {str(pdf_error)}")
+            logger.warning("PDF Error details: %s", pdf_error)
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid PDF file: {str(pdf_error)}"
@@ -140,51 +248,51 @@ async def process_pdf(
         except ValueError as e:
             raise HTTPException(status_code=400, detail=str(e))
 
-        # Convert PDF pages to images with additional options for better compatibility
-        try:
-            images = convert_from_bytes(
-                contents,
-                first_page=min(selected_pages),
-                last_page=max(selected_pages),
-                dpi=225,  # Higher DPI for better quality
-                fmt='png',  # Use PNG format for better quality
-                thread_count=2,  # Use multiple threads for faster processing
-                use_cropbox=True,  # Use cropbox instead of mediabox
-                strict=False  # Less strict parsing for better compatibility
-            )
-            for img in images:
-                print(img.size)
-        except Exception as convert_error:
-            print(f"PDF Conversion Error: {str(convert_error)}")
-            raise HTTPException(
-                status_code=400,
-                detail=f"Error converting PDF to images: {str(convert_error)}"
-            )
+        # Reuse OCR results for pages of this PDF that were already processed
+        pdf_hash = content_hash(contents)
+        predictions = ocr_cache_get(
+            [(pdf_hash, page_num, PROCESS_PDF_DPI) for page_num in selected_pages]
+        )
+        missing_pages = [
+            page_num for page_num, pred in zip(selected_pages, predictions) if pred is None
+        ]
 
-        # Map converted images to selected pages
-        page_images = dict(zip(
-            range(min(selected_pages), max(selected_pages) + 1),
-            images
-        ))
-
-        # Process selected pages
-        results = []
-        for page_num in selected_pages:
-            if page_num in page_images:
-                # Process the image with OCR
-                predictions = recognition_predictor(
-                    [page_images[page_num]], 
-                    [["en"]], 
-                    detection_predictor,
-                    recognition_batch_size=16,
-                    detection_batch_size=16
+        if missing_pages:
+            # Convert the uncached PDF pages to images
+            try:
+                page_images = await run_in_threadpool(
+                    render_pdf_pages, contents, missing_pages, dpi=PROCESS_PDF_DPI
                 )
-                
-                # Add page results
-                results.append({
-                    "page": page_num,
-                    "ocr_data": [serialize_ocr_result(pred) for pred in predictions]
-                })
+                if logger.isEnabledFor(logging.DEBUG):
+                    for page_num, img in page_images.items():
+                        logger.debug("Rendered page %d at %s", page_num, img.size)
+            except Exception as convert_error:
+                logger.warning("PDF Conversion Error: %s", convert_error)
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Error converting PDF to images: {str(convert_error)}"
+                )
+
+            # Process the rendered pages in a single batched OCR call
+            page_nums = [page_num for page_num in missing_pages if page_num in page_images]
+            new_predictions = dict(zip(page_nums, await run_in_threadpool(
+                run_ocr, [page_images[page_num] for page_num in page_nums]
+            )))
+            ocr_cache_put({
+                (pdf_hash, page_num, PROCESS_PDF_DPI): pred
+                for page_num, pred in new_predictions.items()
+            })
+            predictions = [
+                new_predictions.get(page_num) if pred is None else pred
+                for page_num, pred in zip(selected_pages, predictions)
+            ]
+
+        results = [
+            {
+                "page": page_num,
+                "ocr_data": [serialize_ocr_result(pred)]
+            } for page_num, pred in zip(selected_pages, predictions) if pred is not None
+        ]
 
         return {
             "total_pages": total_pages,
@@ -204,38 +312,26 @@ async def get_page_image(
     try:
         contents = await file.read()
         
-        # Convert specific page to image with improved options
+        # Convert specific page to image
         try:
-            images = convert_from_bytes(
-                contents,
-                first_page=page,
-                last_page=page,
-                dpi=200,  # Higher DPI for better quality
-                fmt='png',  # Use PNG format for better quality
-                thread_count=2,  # Use multiple threads for faster processing
-                use_cropbox=True,  # Use cropbox instead of mediabox
-                strict=False  # Less strict parsing for better compatibility
+            page_images = await run_in_threadpool(
+                render_pdf_pages, contents, [page], dpi=200
             )
         except Exception as convert_error:
-            print(f"PDF Conversion Error: {str(convert_error)}")
+            logger.warning("PDF Conversion Error: %s", convert_error)
             raise HTTPException(
                 status_code=400,
                 detail=f"Error converting PDF to image: {str(convert_error)}"
             )
         
-        if not images:
+        if page not in page_images:
             raise HTTPException(status_code=404, detail="Page not found")
             
-        # Convert PIL image to base64
-        img_byte_arr = io.BytesIO()
-        images[0].save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
-        
-        # Convert to base64
-        base64_encoded = base64.b64encode(img_byte_arr).decode('utf-8')
+        # Encode off the event loop; a full page PNG takes tens of ms
+        image_data_url = await run_in_threadpool(encode_png_data_url, page_images[page])
         
         return {
-            "image": f"data:image/png;base64,{base64_encoded}"
+            "image": image_data_url
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing page: {str(e)}")
@@ -244,19 +340,28 @@ async def get_page_image(
 @app.post("/ocr")
 async def ocr_endpoint(file: UploadFile = File(...)):
     """Process a single image file."""
+    # Reject on the known upload size where available, and never read more
+    # than one byte past the limit otherwise
+    if file.size is not None and file.size > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail="Image file too large")
+    contents = await file.read(MAX_IMAGE_BYTES + 1)
+    if len(contents) > MAX_IMAGE_BYTES:
+        raise HTTPException(status_code=413, detail="Image file too large")
+
     try:
-        contents = await file.read()
+        # verify() checks the file structure without decoding pixel data;
+        # the image has to be reopened afterwards
+        Image.open(io.BytesIO(contents)).verify()
         image = Image.open(io.BytesIO(contents))
     except Exception as e:
         raise HTTPException(status_code=400, detail="Invalid image file")
 
-    predictions = recognition_predictor(
-        [image], 
-        [["en"]], 
-        detection_predictor,
-        recognition_batch_size=16,
-        detection_batch_size=16
-    )
+    # Key on the raw upload bytes; hashing decoded pixels would copy the image
+    cache_key = content_hash(contents)
+    predictions = ocr_cache_get([cache_key])
+    if predictions[0] is None:
+        predictions = await run_in_threadpool(run_ocr, [image])
+        ocr_cache_put({cache_key: predictions[0]})
     serialized = [serialize_ocr_result(pred) for pred in predictions]
     return {"results": serialized}
     
@@ -267,8 +372,10 @@ async def save_edited_text(text_edit: TextEdit):
     try:
         # In a real app, you would save this to a database
         # For now, we'll just return success and the saved data
-        print(f"Saving edited text for page {text_edit.page}")
-        print(f"Text lines: {len(text_edit.text_lines)}")
+        logger.info(
+            "Saving edited text for page %d (%d text lines)",
+            text_edit.page, len(text_edit.text_lines)
+        )
         
         # Return the saved data
         return JSONResponse(
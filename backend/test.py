@@ -1,95 +1,119 @@
 import requests
+from requests.adapters import HTTPAdapter
+from requests_toolbelt.multipart.encoder import MultipartEncoder
+import io
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Configuration
 BASE_URL = "http://0.0.0.0:3002"  # Update port if needed
 TEST_PDF_PATH = "/home/prasanna/Downloads/MH-2 PRESSURE REDUCING VALVE;S.NO.489.pdf"  # Update with your test PDF path
 
-def test_pdf_info():
+# Shared session so all tests reuse keep-alive connections to the server
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=16))
+
+# Tests run concurrently, so each one collects its output and returns it
+# alongside the result; main() prints the outputs in a fixed order.
+
+def pdf_upload(pdf_bytes, **fields):
+    """Build a streamed multipart upload of the in-memory test PDF plus form fields."""
+    encoder = MultipartEncoder(fields={
+        'file': (TEST_PDF_PATH, io.BytesIO(pdf_bytes), 'application/pdf'),
+        **fields
+    })
+    return {'data': encoder, 'headers': {'Content-Type': encoder.content_type}}
+
+def test_pdf_info(pdf_bytes):
     """Test the PDF info endpoint."""
-    print("\n🔍 Testing PDF Info Endpoint...")
-    
-    # Check if test file exists
-    if not os.path.exists(TEST_PDF_PATH):
-        print(f"❌ Test failed: Test PDF file not found at {TEST_PDF_PATH}")
-        return False
+    log = ["\n🔍 Testing PDF Info Endpoint..."]
     
     try:
-        # Prepare the file for upload
-        with open(TEST_PDF_PATH, 'rb') as pdf_file:
-            files = {'file': (TEST_PDF_PATH, pdf_file, 'application/pdf')}
+        # Make request to /pdf-info endpoint
+        response = session.post(f"{BASE_URL}/pdf-info", **pdf_upload(pdf_bytes))
+        
+        # Check response
+        if response.status_code == 200:
+            result = response.json()
+            log.append(f"✅ PDF Info retrieved successfully:")
+            log.append(f"   - Total pages: {result['total_pages']}")
+            log.append(f"   - File name: {result['file_name']}")
+            return True, log
+        else:
+            log.append(f"❌ Test failed: Server returned status code {response.status_code}")
+            log.append(f"   Response: {response.text}")
+            return False, log
             
-            # Make request to /pdf-info endpoint
-            response = requests.post(f"{BASE_URL}/pdf-info", files=files)
-            
-            # Check response
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ PDF Info retrieved successfully:")
-                print(f"   - Total pages: {result['total_pages']}")
-                print(f"   - File name: {result['file_name']}")
-                return True
-            else:
-                print(f"❌ Test failed: Server returned status code {response.status_code}")
-                print(f"   Response: {response.text}")
-                return False
-                
     except Exception as e:
-        print(f"❌ Test failed with error: {str(e)}")
-        return False
+        log.append(f"❌ Test failed with error: {str(e)}")
+        return False, log
 
-def test_process_pdf(page_selection="1-3"):
+def test_process_pdf(pdf_bytes, page_selection="1-3"):
     """Test the PDF processing endpoint."""
-    print(f"\n🔍 Testing PDF Processing Endpoint (pages: {page_selection})...")
-    
-    # Check if test file exists
-    if not os.path.exists(TEST_PDF_PATH):
-        print(f"❌ Test failed: Test PDF file not found at {TEST_PDF_PATH}")
-        return False
+    log = [f"\n🔍 Testing PDF Processing Endpoint (pages: {page_selection})..."]
     
     try:
-        # Prepare the file and form data for upload
-        with open(TEST_PDF_PATH, 'rb') as pdf_file:
-            files = {'file': (TEST_PDF_PATH, pdf_file, 'application/pdf')}
-            data = {'page_selection': page_selection}
+        # Make request to /process-pdf endpoint
+        response = session.post(
+            f"{BASE_URL}/process-pdf",
+            **pdf_upload(pdf_bytes, page_selection=page_selection)
+        )
+        
+        # Check response
+        if response.status_code == 200:
+            result = response.json()
+            log.append(f"✅ PDF processed successfully:")
+            log.append(f"   - Total pages in PDF: {result['total_pages']}")
+            log.append(f"   - Processed pages: {len(result['processed_pages'])}")
             
-            # Make request to /process-pdf endpoint
-            response = requests.post(f"{BASE_URL}/process-pdf", files=files, data=data)
-            
-            # Check response
-            if response.status_code == 200:
-                result = response.json()
-                print(f"✅ PDF processed successfully:")
-                print(f"   - Total pages in PDF: {result['total_pages']}")
-                print(f"   - Processed pages: {len(result['processed_pages'])}")
-                
-                # Print details for each processed page
-                for page_result in result['processed_pages']:
-                    page_num = page_result['page']
-                    ocr_data = page_result['ocr_data']
-                    total_text_lines = sum(len(data['text_lines']) for data in ocr_data)
-                    print(f"\n   Page {page_num}:")
-                    print(f"   - Total text lines detected: {total_text_lines}")
-                    
-                    # Print first few text lines as example
-                    if total_text_lines > 0:
-                        print("   - Sample text lines:")
-                        for i, line in enumerate(ocr_data[0]['text_lines'][:3]):
-                            print(f"     {i+1}. {line['text']} (confidence: {line['confidence']:.2f})")
-                return True
-            else:
-                print(f"❌ Test failed: Server returned status code {response.status_code}")
-                print(f"   Response: {response.text}")
-                return False
+            # Print details for each processed page
+            for page_result in result['processed_pages']:
+                page_num = page_result['page']
+                ocr_data = page_result['ocr_data']
+                total_text_lines = sum(len(data['text_lines']) for data in ocr_data)
+                log.append(f"\n   Page {page_num}:")
+                log.append(f"   - Total text lines detected: {total_text_lines}")
                 
+                # Print first few text lines as example
+                if total_text_lines > 0:
+                    log.append("   - Sample text lines:")
+                    for i, line in enumerate(ocr_data[0]['text_lines'][:3]):
+                        log.append(f"     {i+1}. {line['text']} (confidence: {line['confidence']:.2f})")
+            return True, log
+        else:
+            log.append(f"❌ Test failed: Server returned status code {response.status_code}")
+            log.append(f"   Response: {response.text}")
+            return False, log
+            
     except Exception as e:
-        print(f"❌ Test failed with error: {str(e)}")
-        return False
+        log.append(f"❌ Test failed with error: {str(e)}")
+        return False, log
 
-def test_invalid_page_selection():
+def check_invalid_page_selection(pdf_bytes, test_case):
+    """Check that a single invalid page selection is rejected."""
+    log = [f"\nTesting page selection: '{test_case}'"]
+    try:
+        response = session.post(
+            f"{BASE_URL}/process-pdf",
+            **pdf_upload(pdf_bytes, page_selection=test_case)
+        )
+        
+        if response.status_code == 400:
+            log.append(f"✅ Correctly rejected invalid input")
+            log.append(f"   Error: {response.json()['detail']}")
+            return True, log
+        else:
+            log.append(f"❌ Test failed: Expected 400 status code, got {response.status_code}")
+            return False, log
+            
+    except Exception as e:
+        log.append(f"❌ Test failed with error: {str(e)}")
+        return False, log
+
+def test_invalid_page_selection(pdf_bytes):
     """Test the PDF processing endpoint with invalid page selections."""
-    print("\n🔍 Testing Invalid Page Selections...")
+    log = ["\n🔍 Testing Invalid Page Selections..."]
     
     test_cases = [
         "",  # Empty
@@ -99,43 +123,54 @@ def test_invalid_page_selection():
         "1-3-5",  # Invalid range format
     ]
     
-    success = True
-    for test_case in test_cases:
-        print(f"\nTesting page selection: '{test_case}'")
-        try:
-            with open(TEST_PDF_PATH, 'rb') as pdf_file:
-                files = {'file': (TEST_PDF_PATH, pdf_file, 'application/pdf')}
-                data = {'page_selection': test_case}
-                
-                response = requests.post(f"{BASE_URL}/process-pdf", files=files, data=data)
-                
-                if response.status_code == 400:
-                    print(f"✅ Correctly rejected invalid input")
-                    print(f"   Error: {response.json()['detail']}")
-                else:
-                    print(f"❌ Test failed: Expected 400 status code, got {response.status_code}")
-                    success = False
-                    
-        except Exception as e:
-            print(f"❌ Test failed with error: {str(e)}")
-            success = False
+    # Submit all cases at once and collect them in order
+    with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+        futures = [
+            executor.submit(check_invalid_page_selection, pdf_bytes, test_case)
+            for test_case in test_cases
+        ]
+        outcomes = [future.result() for future in futures]
+    
+    for _, case_log in outcomes:
+        log.extend(case_log)
     
-    return success
+    return all(passed for passed, _ in outcomes), log
 
 def main():
     """Run all tests."""
     print("🚀 Starting PDF Processing API Tests...")
     
-    # Track test results
-    results = {
-        # "PDF Info": test_pdf_info(),
-        "Process PDF (Range)": test_process_pdf("1-3"),
-        "Process PDF (Single)": test_process_pdf("1"),
-        "Process PDF (Multiple)": test_process_pdf("1,3,5"),
-        # "Process PDF (All)": test_process_pdf("all"),
-        "Invalid Page Selections": test_invalid_page_selection()
+    # Check if test file exists
+    if not os.path.exists(TEST_PDF_PATH):
+        print(f"❌ Test failed: Test PDF file not found at {TEST_PDF_PATH}")
+        return 1
+    
+    # Read the PDF once and share it between all requests
+    pdf_bytes = Path(TEST_PDF_PATH).read_bytes()
+    
+    tests = {
+        # "PDF Info": (test_pdf_info,),
+        "Process PDF (Range)": (test_process_pdf, "1-3"),
+        "Process PDF (Single)": (test_process_pdf, "1"),
+        "Process PDF (Multiple)": (test_process_pdf, "1,3,5"),
+        # "Process PDF (All)": (test_process_pdf, "all"),
+        "Invalid Page Selections": (test_invalid_page_selection,)
     }
     
+    # Run all tests concurrently
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {
+            test_name: executor.submit(test_fn, pdf_bytes, *args)
+            for test_name, (test_fn, *args) in tests.items()
+        }
+        outcomes = {test_name: future.result() for test_name, future in futures.items()}
+    
+    # Track test results
+    results = {}
+    for test_name, (passed, log) in outcomes.items():
+        print("\n".join(log))
+        results[test_name] = passed
+    
     # Print summary
     print("\n📊 Test Summary:")
     for test_name, passed in results.items():
@@ -151,4 +186,4 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())